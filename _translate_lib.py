@@ -0,0 +1,245 @@
+"""
+Shared implementation of the file translator scripts (pytrans, tofa).
+
+Each script only picks the target language; the translation:
+1. Reads a file and auto-detects language
+2. Translates to target_lang in chunks respecting word boundaries
+3. Respects 5000 character limit per request
+4. Saves result to fname_<target_lang>.extension
+5. Skips if output file already exists
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from deep_translator import GoogleTranslator
+from tqdm import tqdm
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+MAX_CHARS = 5000  # Character limit per request
+MAX_CONCURRENT = 5  # Chunk requests in flight at once
+IO_BUFFER = 1 << 20  # open() buffer size for input/output files
+GOOGLE_API_URL = 'https://translate.googleapis.com/translate_a/single'
+
+# Break points in priority order. '\r\n' is not listed: any text containing it
+# also contains '\n' one position later, which is tried first.
+DELIMITERS = ('\n', '.  ', '!  ', '?  ', '; ', ', ', ' ')
+
+
+def get_output_filename(input_file, target_lang):
+    """Generate output filename:  fname_<target_lang>.extension"""
+    path = Path(input_file)
+    stem = path.stem
+    suffix = path.suffix
+    return path.parent / f'{stem}_{target_lang}{suffix}'
+
+
+def load_file(input_file):
+    """Load file content with encoding detection."""
+    encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+
+    for encoding in encodings:
+        try:
+            with open(input_file, 'r', encoding=encoding, buffering=IO_BUFFER) as f:
+                return f.read()
+        except (UnicodeDecodeError, IOError):
+            continue
+
+    raise IOError(f'Could not read file {input_file} with any encoding')
+
+
+def save_file(output_file, content):
+    """Save content to file."""
+    with open(output_file, 'w', encoding='utf-8', buffering=IO_BUFFER) as f:
+        f.write(content)
+
+
+def find_chunk_boundary(text, max_chars):
+    """
+    Find a good chunk boundary respecting word boundaries.
+    Tries each delimiter in priority order and splits right after its last
+    occurrence before the max_chars limit.
+    """
+    if len(text) <= max_chars:
+        return len(text)
+
+    search_area = text[:max_chars]
+
+    for delimiter in DELIMITERS:
+        last_pos = search_area.rfind(delimiter)
+        if last_pos > 0:
+            return last_pos + len(delimiter)
+
+    # No delimiter at all, just break at limit (shouldn't happen often)
+    return max_chars
+
+
+def chunk_text(text, max_chars):
+    """
+    Split text into chunks respecting word boundaries and character limit.
+    """
+    chunks = []
+    pos = 0
+
+    while pos < len(text):
+        # Only slice what the boundary search can look at, not the whole remainder
+        window = text[pos : pos + max_chars + 1]
+
+        if len(window) <= max_chars:
+            chunks.append(window)
+            break
+
+        chunk_end = find_chunk_boundary(window, max_chars)
+        chunks.append(window[:chunk_end])
+        pos += chunk_end
+
+    return chunks
+
+
+_local = threading.local()
+
+
+def get_translator(source_lang, target):
+    """
+    Return a GoogleTranslator for (source_lang, target), built once per thread.
+    Instances keep per-request state in _url_params, so they are not shared across threads.
+    """
+    cache = getattr(_local, 'translators', None)
+    if cache is None:
+        cache = _local.translators = {}
+    key = (source_lang, target)
+    if key not in cache:
+        cache[key] = GoogleTranslator(source=source_lang, target=target)
+    return cache[key]
+
+
+def translate_chunk(text, target_lang, source_lang='auto'):
+    """Translate a single chunk with retry."""
+    translator = get_translator(source_lang, target_lang)
+    for attempt in range(3):
+        try:
+            translated = translator.translate(text)
+            return translated, source_lang
+        except Exception as e:
+            print(f'[WARN] Translation failed (attempt {attempt + 1}/3): {e}')
+            time.sleep(1 + attempt)
+
+    raise Exception(f'Failed to translate chunk after 3 attempts')
+
+
+async def _translate_chunk(session, sem, text, target_lang, source_lang='auto'):
+    """Translate a single chunk over HTTP with retry, at most MAX_CONCURRENT at a time."""
+    async with sem:
+        if session is None:
+            # aiohttp not installed: run the blocking deep_translator call in a thread
+            return await asyncio.to_thread(translate_chunk, text, target_lang, source_lang)
+
+        params = {'client': 'gtx', 'sl': source_lang, 'tl': target_lang, 'dt': 't'}
+        for attempt in range(3):
+            try:
+                async with session.post(GOOGLE_API_URL, params=params, data={'q': text}) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json(content_type=None)
+                translated = ''.join(seg[0] for seg in data[0] if seg[0])
+                return translated, data[2] or source_lang
+            except Exception as e:
+                print(f'[WARN] Translation failed (attempt {attempt + 1}/3): {e}')
+                await asyncio.sleep(1 + attempt)
+
+    raise Exception(f'Failed to translate chunk after 3 attempts')
+
+
+async def translate_chunks(chunks, target_lang, source_lang='auto'):
+    """
+    Translate all chunks concurrently, returning (text, detected_lang) in input order.
+    A chunk that fails every attempt is kept untranslated.
+    """
+    sem = asyncio.BoundedSemaphore(MAX_CONCURRENT)
+    results = [None] * len(chunks)
+
+    async def run(session, i, chunk):
+        try:
+            results[i] = await _translate_chunk(session, sem, chunk, target_lang, source_lang)
+        except Exception as e:
+            print(f'\n[ERROR] Chunk {i + 1} failed, keeping original text: {e}')
+            results[i] = (chunk, None)
+
+    async def gather(session):
+        tasks = [run(session, i, chunk) for i, chunk in enumerate(chunks)]
+        with tqdm(total=len(chunks), desc='Translating', unit='chunk') as pbar:
+            for done in asyncio.as_completed(tasks):
+                await done
+                pbar.update(1)
+
+    if aiohttp is None:
+        await gather(None)
+    else:
+        async with aiohttp.ClientSession() as session:
+            await gather(session)
+
+    return results
+
+
+def translate_file(input_file, target_lang, source_lang='auto'):
+    """
+    Translate entire file to target_lang, chunking if necessary.
+    """
+    print(f'[INFO] Reading file: {input_file}')
+    content = load_file(input_file)
+    content_length = len(content)
+    print(f'[INFO] File size: {content_length} characters')
+
+    # Check if chunking needed
+    if content_length <= MAX_CHARS:
+        print(f'[INFO] Content fits in single request ({content_length} chars)')
+        print(f'[INFO] Translating...')
+        translated, detected_lang = translate_chunk(content, target_lang, source_lang)
+        print(f'[INFO] Detected language: {detected_lang}')
+        return translated
+
+    # Need to chunk
+    chunks = chunk_text(content, MAX_CHARS)
+    total_chunks = len(chunks)
+    print(f'[INFO] Content split into {total_chunks} chunks')
+    print(f'[INFO] Chunk sizes: {[len(c) for c in chunks]}')
+
+    results = asyncio.run(translate_chunks(chunks, target_lang, source_lang))
+
+    detected_lang = next((lang for _, lang in results if lang), None)
+    print(f'[INFO] Detected language: {detected_lang}')
+    return ''.join(text for text, _ in results)
+
+
+def make_translate_main(target_lang):
+    """Build the command line entry point of a script translating into target_lang."""
+
+    def main():
+        if len(sys.argv) < 2:
+            print(f'Usage: {Path(sys.argv[0]).name} <input_file> [source_lang]')
+            sys.exit(1)
+
+        input_file = sys.argv[1]
+        source_lang = sys.argv[2] if len(sys.argv) > 2 else 'auto'
+
+        if not os.path.isfile(input_file):
+            print(f'[ERROR] File not found: {input_file}')
+            sys.exit(1)
+
+        output_file = get_output_filename(input_file, target_lang)
+        if output_file.exists():
+            print(f'[SKIP] Output file already exists: {output_file}')
+            return
+
+        translated = translate_file(input_file, target_lang, source_lang)
+        save_file(output_file, translated)
+        print(f'[DONE] Saved translation to: {output_file}')
+
+    return main
@@ -1,64 +1,118 @@
 #!/data/data/com.termux/files/usr/bin/python
 
+import argparse
 import os
+import resource
 import stat
-import fastwalk
-from pathlib import Path
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+# Desired permissions
+DIR_PERM = 0o775  # rwxrwxr-x
+FILE_PERM = 0o664  # rw-rw-r--
 
-def get_mode(path: Path) -> int:
+MAX_WORKERS = (os.cpu_count() or 4) * 2
+
+
+def get_mode(entry: os.DirEntry) -> int:
     """
     Return permission bits only (e.g. 0o775, 0o664),
     stripping file type flags.
     """
-    return stat.S_IMODE(path.stat().st_mode)
+    return stat.S_IMODE(entry.stat(follow_symlinks=False).st_mode)
 
 
-def normalize_permissions(homedir: str) -> None:
-    # Desired permissions
-    DIR_PERM = 0o775  # rwxrwxr-x
-    FILE_PERM = 0o664  # rw-rw-r--
+def _fd_budget() -> int:
+    """Number of directories we allow open at once, leaving room for stdio etc."""
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return MAX_WORKERS
+    return max(1, soft - 64)
 
-    for pth in fastwalk.walk(homedir):
-        path = Path(pth)
-        try:
-            current_perm = get_mode(path)
-            if path.is_dir():
-                if current_perm != DIR_PERM:
-                    os.chmod(path, DIR_PERM)
-                    print(
-                        f'Set permissions for directory: {path} '
-                        f'from {oct(current_perm)} to {oct(DIR_PERM)}'
-                    )
-
-            elif path.is_file():
-                if current_perm != FILE_PERM:
-                    os.chmod(path, FILE_PERM)
-                    print(
-                        f'Set permissions for file: {path} '
-                        f'from {oct(current_perm)} to {oct(FILE_PERM)}'
-                    )
-                try:
-                    for encod in ['utf-8', 'windows-1251']:
-                        with open(path, 'r', errors='ignore', encoding=encod) as f:
-                            h10 = f.read()
-                            print(f'{str(h10)}')
-                except:
-                    pribt(f'error reading {path}')
 
+def _fix_entry(entry: os.DirEntry, verbose: bool) -> bool:
+    """chmod a single entry if needed. Return True if it is a directory to descend into."""
+    try:
+        if entry.is_dir(follow_symlinks=False):
+            kind, wanted, is_dir = 'directory', DIR_PERM, True
+        elif entry.is_file(follow_symlinks=False):
+            kind, wanted, is_dir = 'file', FILE_PERM, False
+        else:
+            return False
+
+        current_perm = get_mode(entry)
+        if current_perm != wanted:
+            os.chmod(entry.path, wanted)
+            if verbose:
+                print(
+                    f'Set permissions for {kind}: {entry.path} '
+                    f'from {oct(current_perm)} to {oct(wanted)}'
+                )
+        return is_dir
+
+    except PermissionError as e:
+        print(f'Permission denied: {entry.path} ({e})')
+
+    except FileNotFoundError:
+        # File may disappear during traversal
+        pass
+
+    except OSError as e:
+        print(f'OS error on {entry.path}: {e}')
+
+    return False
+
+
+def normalize_permissions(homedir: str, verbose: bool = False) -> None:
+    open_dirs = threading.BoundedSemaphore(_fd_budget())
+    pending = 0
+    pending_lock = threading.Lock()
+    done = threading.Event()
+
+    def submit(path: str) -> None:
+        nonlocal pending
+        with pending_lock:
+            pending += 1
+        pool.submit(scan, path)
+
+    def finish() -> None:
+        nonlocal pending
+        with pending_lock:
+            pending -= 1
+            if pending == 0:
+                done.set()
+
+    def scan(path: str) -> None:
+        try:
+            subdirs = []
+            with open_dirs:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if _fix_entry(entry, verbose):
+                            subdirs.append(entry.path)
+            for sub in subdirs:
+                submit(sub)
         except PermissionError as e:
             print(f'Permission denied: {path} ({e})')
-
         except FileNotFoundError:
-            # File may disappear during traversal
-            continue
-
+            # Directory may disappear during traversal
+            pass
         except OSError as e:
             print(f'OS error on {path}: {e}')
+        finally:
+            finish()
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        submit(homedir)
+        done.wait()
 
 
 if __name__ == '__main__':
     #    home_dir = os.environ.get("HOME")
     #    if not home_dir:
     #        raise RuntimeError("HOME environment variable not set")
-    normalize_permissions('.')
+    parser = argparse.ArgumentParser(description='Normalize dir/file permissions to 775/664')
+    parser.add_argument('path', nargs='?', default='.', help='Root directory (default: .)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Report every change')
+    args = parser.parse_args()
+    normalize_permissions(args.path, args.verbose)
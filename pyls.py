@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 import argparse
-import datetime
+import functools
 import grp
 import os
 import pwd
 import stat
 import sys
-from pathlib import Path
+import time
 
 # =============================
 # ANSI COLORS
@@ -28,16 +28,20 @@ def use_color(mode: str) -> bool:
     return sys.stdout.isatty()
 
 
+COLOR_BY_IFMT = {
+    stat.S_IFDIR: COLORS['dir'],
+    stat.S_IFLNK: COLORS['link'],
+}
+
+
 def colorize(name, st, enabled):
     if not enabled:
         return name
-    if stat.S_ISDIR(st.st_mode):
-        return f'{COLORS["dir"]}{name}{COLORS["reset"]}'
-    if stat.S_ISLNK(st.st_mode):
-        return f'{COLORS["link"]}{name}{COLORS["reset"]}'
-    if st.st_mode & stat.S_IXUSR:
-        return f'{COLORS["exec"]}{name}{COLORS["reset"]}'
-    return name
+    mode = st.st_mode
+    c = COLOR_BY_IFMT.get(stat.S_IFMT(mode))
+    if c is None and mode & stat.S_IXUSR:
+        c = COLORS['exec']
+    return f'{c}{name}{COLORS["reset"]}' if c else name
 
 
 # =============================
@@ -53,7 +57,7 @@ def human_size(size):
     return f'{size}P'
 
 
-def indicator(path, st):
+def indicator(st):
     if stat.S_ISDIR(st.st_mode):
         return '/'
     if stat.S_ISLNK(st.st_mode):
@@ -63,9 +67,32 @@ def indicator(path, st):
     return ''
 
 
-def format_time(ts, full):
-    dt = datetime.datetime.fromtimestamp(ts)
-    return dt.strftime('%Y-%m-%d %H:%M:%S' if full else '%b %d %H:%M')
+@functools.lru_cache(maxsize=1024)
+def _pw_name(uid):
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+@functools.lru_cache(maxsize=1024)
+def _gr_name(gid):
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return str(gid)
+
+
+FULL_TIME_FMT = '%Y-%m-%d %H:%M:%S'
+SHORT_TIME_FMT = '%b %d %H:%M'
+
+
+def time_format(full):
+    return FULL_TIME_FMT if full else SHORT_TIME_FMT
+
+
+def format_time(ts, fmt):
+    return time.strftime(fmt, time.localtime(ts))
 
 
 # =============================
@@ -73,37 +100,35 @@ def format_time(ts, full):
 # =============================
 
 
-def format_entry(entry, args, color_enabled):
-    try:
-        st = entry.stat(follow_symlinks=args.L)
-    except FileNotFoundError:
-        return ''
+def format_entry(entry, st, args, color_enabled, time_fmt):
+    """Return (line, visible_width); ANSI color codes do not count towards the width."""
+    name = colorize(entry.name, st, color_enabled)
+    hidden = len(name) - len(entry.name)
 
-    name = entry.name
-    name = colorize(name, st, color_enabled)
-
-    if args.p and entry.is_dir():
+    if args.p and stat.S_ISDIR(st.st_mode):
         name += '/'
     if args.F:
-        name += indicator(entry, st)
+        name += indicator(st)
 
     inode = f'{st.st_ino} ' if args.i else ''
     blocks = f'{st.st_blocks} ' if args.s else ''
 
     if not args.l:
-        return f'{inode}{blocks}{name}'
+        line = f'{inode}{blocks}{name}'
+        return line, len(line) - hidden
 
     perms = stat.filemode(st.st_mode)
     nlink = st.st_nlink
-    uid = st.st_uid if args.n else pwd.getpwuid(st.st_uid).pw_name
-    gid = st.st_gid if args.n else grp.getgrgid(st.st_gid).gr_name
+    uid = st.st_uid if args.n else _pw_name(st.st_uid)
+    gid = st.st_gid if args.n else _gr_name(st.st_gid)
     size = human_size(st.st_size) if args.h else st.st_size
 
     ts = st.st_ctime if args.lc else st.st_atime if args.lu else st.st_mtime
 
-    time_str = format_time(ts, args.full_time)
+    time_str = format_time(ts, time_fmt)
 
-    return f'{inode}{blocks}{perms} {nlink} {uid} {gid} {size:>6} {time_str} {name}'
+    line = f'{inode}{blocks}{perms} {nlink} {uid} {gid} {size:>6} {time_str} {name}'
+    return line, len(line) - hidden
 
 
 # =============================
@@ -112,43 +137,49 @@ def format_entry(entry, args, color_enabled):
 
 
 def scan_dir(path, args):
+    """Return a sorted list of (DirEntry, stat_result) pairs for path."""
+    if args.a:
+        show = lambda name: True
+    else:
+        show = lambda name: not name.startswith('.')
+
+    entries = []
     try:
         with os.scandir(path) as it:
-            entries = [Path(e.path) for e in it]
+            for e in it:
+                if not show(e.name):
+                    continue
+                try:
+                    entries.append((e, e.stat(follow_symlinks=args.L)))
+                except FileNotFoundError:
+                    continue
     except PermissionError:
         print(f"ls: cannot open directory '{path}'", file=sys.stderr)
         return []
 
-    if not args.a:
-        if args.A:
-            entries = [
-                e for e in entries if e.name not in ('.', '..') and not e.name.startswith('.')
-            ]
-        else:
-            entries = [e for e in entries if not e.name.startswith('.')]
-
-    def key(p):
-        try:
-            st = p.stat(follow_symlinks=args.L)
-        except FileNotFoundError:
-            return 0
-        if args.S:
-            return -st.st_size
-        if args.t:
-            return -st.st_mtime
-        if args.tc:
-            return -st.st_ctime
-        if args.tu:
-            return -st.st_atime
-        if args.X:
-            return p.suffix
-        return p.name
-
-    entries.sort(key=key, reverse=args.r)
+    if args.S:
+        primary = lambda e, st: -st.st_size
+    elif args.t:
+        primary = lambda e, st: -st.st_mtime
+    elif args.tc:
+        primary = lambda e, st: -st.st_ctime
+    elif args.tu:
+        primary = lambda e, st: -st.st_atime
+    elif args.X:
+        primary = lambda e, st: os.path.splitext(e.name)[1]
+    else:
+        primary = lambda e, st: e.name
 
     if args.group_directories_first:
-        entries.sort(key=lambda e: not e.is_dir())
+        # Directories stay first even when the order is reversed.
+        def key(es):
+            group = es[0].is_dir()
+            return (group if args.r else not group, primary(*es))
+    else:
+        def key(es):
+            return primary(*es)
 
+    entries.sort(key=key, reverse=args.r)
     return entries
 
 
@@ -158,15 +189,24 @@ def scan_dir(path, args):
 
 
 def print_columns(items, width, by_row):
+    """Lay out (text, visible_width) pairs from format_entry in columns."""
     if not items:
         return
 
-    max_len = max(len(i) for i in items) + 2
+    max_len = max(vl for _, vl in items) + 2
     cols = max(1, width // max_len)
     rows = (len(items) + cols - 1) // cols
 
+    # Build the whole grid first and hand it to stdout in one write
+    lines = []
     for r in range(rows):
+        parts = []
         for c in range(cols):
             idx = r * cols + c if by_row else c * rows + r
             if idx < len(items):
-                print(items[idx].ljust(max_len), end='')
\ No newline at end of file
+                text, vl = items[idx]
+                parts.append(text + ' ' * (max_len - vl))
+        lines.append(''.join(parts))
+    lines.append('')
+    sys.stdout.write('\n'.join(lines))
+    sys.stdout.flush()
@@ -5,13 +5,19 @@ path: ./extract_urls.py
 
 from __future__ import annotations
 
+import atexit
+import functools
+import heapq
+import mmap
 import os
 import tarfile
+import tempfile
 import threading
 import zipfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Iterable, Set
-from urllib.parse import urlparse, urlunparse
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+from urllib.parse import urlparse, uses_netloc, uses_params
 
 import regex as re
 
@@ -20,15 +26,69 @@ try:
 except Exception:
     zstd = None
 
-URL_RE = re.compile(
-    r"""(https?://[^\s<>"\']+|\bwww\.[^\s<>"\']+\b|\b[^\s<>"\']+\.(com|net|org)[^\s<>"\']*)"""
+try:
+    import re2  # google-re2: linear-time automaton, no catastrophic backtracking
+except Exception:
+    re2 = None
+
+# Matched on decoded text: a bytes pattern would make \b and \s ASCII-only, so a
+# domain like 'ébay.com' would lose its first letter and URLs would run past
+# NBSP / U+3000.
+URL_PATTERN = (
+    r"""(https?://[^\s<>"\']+|\bwww\.[^\s<>"\']+\b"""
+    r"""|\b[^\s<>"\']+\.(?:com|net|org)[^\s<>"\']*)"""
+)
+
+# RE2's \b, \w and \s are ASCII-only even on str, and it has no lookaround. The
+# same matches are spelled out with explicit Unicode classes (those of the regex
+# module): the leading \b becomes a consumed non-word char (or ^) outside the URL
+# group, and the trailing \b of the www form becomes "ends in a word char".
+_WORD = (
+    r'\pL\pM\p{Nd}\p{Nl}\p{Pc}\x{200c}\x{200d}'
+    r'\x{24b6}-\x{24e9}\x{1f130}-\x{1f149}\x{1f150}-\x{1f169}\x{1f170}-\x{1f189}'
+)
+_SPACE = (
+    r'\t\n\x{0b}\f\r \x{85}\x{a0}\x{1680}\x{2000}-\x{200a}'
+    r'\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}'
+)
+_URL_CHAR = rf"""[^{_SPACE}<>"\']"""
+RE2_URL_PATTERN = (
+    rf'(https?://{_URL_CHAR}+)'
+    rf'|(?:^|[^{_WORD}])'
+    rf'(www\.{_URL_CHAR}*[{_WORD}]|[{_WORD}]{_URL_CHAR}*\.(?:com|net|org){_URL_CHAR}*)'
 )
 
+if re2:
+    # RE2 matches UTF-8 bytes natively and the classes above are explicit, so the
+    # buffer is scanned as-is and only matched URLs are decoded.
+    URL_RE = re2.compile(RE2_URL_PATTERN.encode())
+    URL_SCAN_KW: Dict[str, bool] = {}
+else:
+    URL_RE = re.compile(URL_PATTERN)
+    # concurrent=True releases the GIL while matching, so member scans
+    # running on the archive pool actually overlap.
+    URL_SCAN_KW = {'concurrent': True}
+
 GITHUB_RE = re.compile(r'(?i)github\.com')
+# Path markers for classify_github_url; the trailing '/' is a lookahead so that
+# adjacent markers like '/pull/issues/' are all found.
+GITHUB_KIND_RE = re.compile(r'(?i)/(issues(?=/)|pulls?(?=/)|releases)')
 
 MAX_WORKERS = os.cpu_count() or 4
 
-all_urls: Set[str] = set()
+# Archive members are scanned in windows of STREAM_CHUNK bytes. A window is cut
+# after its last whitespace byte (URLs never contain whitespace), looking back at
+# most STREAM_OVERLAP bytes; the remainder is carried into the next window.
+STREAM_CHUNK = 1 << 20
+STREAM_OVERLAP = 256
+_WHITESPACE = (b' ', b'\n', b'\t', b'\r', b'\f', b'\v')
+
+# Once _pending_urls holds SPILL_THRESHOLD entries it is swapped for an empty set
+# and written out as a sorted run file; iter_all_urls() merges the runs back with
+# what is still pending (like `sort -u`). Read results through iter_all_urls().
+SPILL_THRESHOLD = 1_000_000
+
+_pending_urls: Set[str] = set()
 git_urls: Set[str] = set()
 git_urls_classified: Dict[str, Set[str]] = {
     'repo': set(),
@@ -40,41 +100,83 @@ git_urls_classified: Dict[str, Set[str]] = {
     'other': set(),
 }
 
+spill_runs: List[str] = []
+
 lock = threading.Lock()
 
+# Archive members are scanned on this one pool, shared by every archive and kept
+# apart from the pool that runs process_path(), so an archive waiting on its
+# members never holds a thread its members need. _member_slots caps the windows
+# queued or running across all archives at 2*MAX_WORKERS.
+_member_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='members')
+_member_slots = threading.BoundedSemaphore(MAX_WORKERS * 2)
+
 
+# One-pass equivalent of urlsplit(): scheme, netloc, path, query (fragment dropped).
+URL_SPLIT_RE = re.compile(
+    r'^(?:([A-Za-z][A-Za-z0-9+.\-]*):)?(?://([^/?#]*))?([^?#]*)(?:\?([^#]*))?'
+)
+
+
+def split_url(url: str) -> Tuple[str, str, str, str]:
+    """Return (scheme, netloc, path, query) like urlparse(), without the ParseResult."""
+    scheme, netloc, path, query = URL_SPLIT_RE.match(url).groups()
+    if netloc and ('[' in netloc or ']' in netloc):
+        # IPv6 literals: let urlparse validate them (and raise like it does)
+        p = urlparse(url)
+        return p.scheme, p.netloc, p.path, p.query
+    scheme = (scheme or '').lower()
+    if scheme in uses_params:
+        # urlparse() moves ';params' of the last path segment out of the path
+        slash = path.rfind('/')
+        semi = path.find(';', slash) if slash >= 0 else path.find(';')
+        if semi >= 0:
+            path = path[:semi]
+    return scheme, netloc or '', path, query or ''
+
+
+@functools.lru_cache(maxsize=65536)
 def normalize_url(url: str) -> str:
     try:
-        p = urlparse(url)
-        scheme = p.scheme.lower()
-        netloc = p.netloc.lower()
+        scheme, netloc, path, query = split_url(url)
+        netloc = netloc.lower()
 
         if (scheme == 'http' and netloc.endswith(':80')) or (
             scheme == 'https' and netloc.endswith(':443')
         ):
             netloc = netloc.rsplit(':', 1)[0]
 
-        path = p.path.rstrip('/') or '/'
-
-        return urlunparse((scheme, netloc, path, '', p.query, ''))
+        path = path.rstrip('/') or '/'
+
+        if netloc or (scheme and scheme in uses_netloc and path[:2] != '//'):
+            if path[:1] != '/':
+                path = '/' + path
+            path = '//' + netloc + path
+        if scheme:
+            path = scheme + ':' + path
+        if query:
+            path = path + '?' + query
+        return path
     except Exception:
         return url
 
 
 def classify_github_url(url: str) -> str:
     try:
-        p = urlparse(url)
-        path = p.path.lower()
+        _, netloc, path, _ = split_url(url)
 
-        if p.netloc.startswith('raw.githubusercontent.com'):
+        if netloc.startswith('raw.githubusercontent.com'):
             return 'raw'
         if url.endswith('.git'):
             return 'clone'
-        if '/issues/' in path:
-            return 'issue'
-        if '/pull/' in path or '/pulls/' in path:
-            return 'pull'
-        if '/releases' in path:
+
+        # One scan for every marker, then pick by priority (issue > pull > release)
+        kinds = {k.lower() for k in GITHUB_KIND_RE.findall(path)}
+        if kinds:
+            if 'issues' in kinds:
+                return 'issue'
+            if 'pull' in kinds or 'pulls' in kinds:
+                return 'pull'
             return 'release'
 
         parts = [x for x in path.split('/') if x]
@@ -86,44 +188,186 @@ def classify_github_url(url: str) -> str:
         return 'other'
 
 
-def extract_urls_from_bytes(data: bytes) -> Set[str]:
+@functools.lru_cache(maxsize=65536)
+def url_from_match(raw: bytes) -> str:
+    """Decode and normalize one raw URL_RE match; repeated matches skip both steps."""
+    return normalize_url(raw.decode('utf-8', errors='ignore'))
+
+
+def extract_urls_from_bytes(data) -> Set[str]:
+    """Return the normalized URLs in any bytes-like buffer (bytes, mmap, ...)."""
     try:
-        text = data.decode('utf-8', errors='ignore')
-        return {normalize_url(u) for u in URL_RE.findall(text)}
+        if re2:
+            # The URL is whichever group matched (RE2_URL_PATTERN has two)
+            return {url_from_match(m.group(m.lastindex)) for m in URL_RE.finditer(data)}
+        text = str(data, 'utf-8', 'ignore')
+        return {normalize_url(m.group()) for m in URL_RE.finditer(text, **URL_SCAN_KW)}
     except Exception:
         return set()
 
 
-def handle_file_bytes(data: bytes) -> None:
-    urls = extract_urls_from_bytes(data)
+def _release_member_slot(_fut) -> None:
+    _member_slots.release()
+
+
+def extract_urls_from_many(blobs: Iterable[bytes]) -> Set[str]:
+    """Scan many buffers on the shared member pool (see _member_slots for the bound)."""
+    found: Set[str] = set()
+    pending = set()
+    for data in blobs:
+        _member_slots.acquire()
+        try:
+            fut = _member_pool.submit(extract_urls_from_bytes, data)
+        except BaseException:
+            _member_slots.release()
+            raise
+        fut.add_done_callback(_release_member_slot)
+        pending.add(fut)
+        if len(pending) >= MAX_WORKERS * 2:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                found |= fut.result()
+    for fut in as_completed(pending):
+        found |= fut.result()
+    return found
+
+
+def handle_file_bytes(data) -> None:
+    handle_urls(extract_urls_from_bytes(data))
+
+
+def handle_urls(urls: Set[str]) -> None:
+    global _pending_urls
+
     if not urls:
         return
 
+    # Classify outside the lock; only the set merges are serialized.
+    local_git = {u for u in urls if GITHUB_RE.search(u)}
+    local_classified: Dict[str, Set[str]] = defaultdict(set)
+    for u in local_git:
+        local_classified[classify_github_url(u)].add(u)
+
+    batch = None
+    with lock:
+        _pending_urls.update(urls)
+        git_urls.update(local_git)
+        for cat, found in local_classified.items():
+            git_urls_classified[cat].update(found)
+        if len(_pending_urls) >= SPILL_THRESHOLD:
+            batch, _pending_urls = _pending_urls, set()
+
+    # Sort and write without holding the lock, so other scans keep merging.
+    if batch:
+        spill_urls(batch)
+
+
+def spill_urls(urls: Set[str]) -> None:
+    """Write urls to disk as a sorted run file for iter_all_urls()."""
+    fd, run = tempfile.mkstemp(prefix='urls-', suffix='.run')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.writelines(u + '\n' for u in sorted(urls))
     with lock:
-        for u in urls:
-            all_urls.add(u)
-            if GITHUB_RE.search(u):
-                git_urls.add(u)
-                cat = classify_github_url(u)
-                git_urls_classified[cat].add(u)
+        spill_runs.append(run)
+
+
+def iter_all_urls() -> Iterator[str]:
+    """
+    Yield every URL found, sorted and deduplicated across memory and spilled runs.
+    Call it once scanning has finished.
+    """
+    files = [open(run, encoding='utf-8') for run in spill_runs]
+    try:
+        streams = [(line.rstrip('\n') for line in f) for f in files]
+        last = None
+        for u in heapq.merge(sorted(_pending_urls), *streams):
+            if u != last:
+                yield u
+                last = u
+    finally:
+        for f in files:
+            f.close()
+
+
+@atexit.register
+def _remove_spill_runs() -> None:
+    for run in spill_runs:
+        try:
+            os.remove(run)
+        except OSError:
+            pass
 
 
 def process_regular_file(path: str) -> None:
     try:
         with open(path, 'rb') as f:
-            handle_file_bytes(f.read())
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            if not re2:
+                # The regex path has to decode what it scans: do it one window at a time
+                handle_urls(extract_urls_from_many(_stream_windows(f)))
+                return
+            # Scan the page cache directly instead of copying the file into a bytes object.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                handle_file_bytes(mm)
     except Exception:
         pass
 
 
-def process_zip(path: str) -> None:
+def _stream_windows(fp) -> Iterator[bytes]:
+    """Yield fp's contents as bounded windows that do not split URLs."""
+    carry = b''
+    while True:
+        chunk = fp.read(STREAM_CHUNK)
+        if not chunk:
+            break
+        buf = carry + chunk
+        lo = max(0, len(buf) - STREAM_OVERLAP)
+        cut = max(buf.rfind(ws, lo) for ws in _WHITESPACE) + 1
+        if not cut:
+            # No whitespace near the end: split blindly (URLs > STREAM_OVERLAP may break),
+            # but not inside a UTF-8 sequence, or the decode would drop that character.
+            # A sequence has at most 3 continuation bytes, so don't look back further.
+            cut = lo
+            while cut > max(0, lo - 3) and buf[cut] & 0xC0 == 0x80:
+                cut -= 1
+        if cut:
+            yield buf[:cut]
+        carry = buf[cut:]
+    if carry:
+        yield carry
+
+
+def _zip_members(z: zipfile.ZipFile) -> Iterator[bytes]:
+    for name in z.namelist():
+        try:
+            with z.open(name) as f:
+                yield from _stream_windows(f)
+        except Exception:
+            continue
+
+
+def _tar_members(t: tarfile.TarFile) -> Iterator[bytes]:
+    # Iterating the TarFile works for both random-access and stream ('r|*') modes;
+    # each member is consumed before the archive advances to the next header.
     try:
-        with zipfile.ZipFile(path) as z:
-            for name in z.namelist():
+        for m in t:
+            if m.isfile():
                 try:
-                    handle_file_bytes(z.read(name))
+                    f = t.extractfile(m)
+                    if f:
+                        yield from _stream_windows(f)
                 except Exception:
                     continue
+    except Exception:
+        # Truncated/corrupt archive: stop here so members already read are still reported
+        return
+
+
+def process_zip(path: str) -> None:
+    try:
+        with zipfile.ZipFile(path) as z:
+            handle_urls(extract_urls_from_many(_zip_members(z)))
     except Exception:
         pass
 
@@ -131,14 +375,7 @@ def process_zip(path: str) -> None:
 def process_tar(path: str) -> None:
     try:
         with tarfile.open(path, 'r:*') as t:
-            for m in t.getmembers():
-                if m.isfile():
-                    try:
-                        f = t.extractfile(m)
-                        if f:
-                            handle_file_bytes(f.read())
-                    except Exception:
-                        continue
+            handle_urls(extract_urls_from_many(_tar_members(t)))
     except Exception:
         pass
 
@@ -150,16 +387,9 @@ def process_tar_zst(path: str) -> None:
     try:
         with open(path, 'rb') as f:
             dctx = zstd.ZstdDecompressor()
-            stream = dctx.stream_reader(f)
+            stream = dctx.stream_reader(f, read_size=STREAM_CHUNK)
             with tarfile.open(fileobj=stream, mode='r|*') as t:
-                for m in t:
-                    if m.isfile():
-                        try:
-                            f2 = t.extractfile(m)
-                            if f2:
-                                handle_file_bytes(f2.read())
-                        except Exception:
-                            continue
+                handle_urls(extract_urls_from_many(_tar_members(t)))
     except Exception:
         pass
 